@@ -2,15 +2,24 @@
 
 import argparse
 import sys
-import webbrowser
-import json
 import os
+import time
 from pathlib import Path
-from threading import Timer
+
+# Subcommand defaults, shared by argparse and the bare-command fast path
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8000
+DEFAULT_EDITOR = "both"
 
 
 def main():
     """Main CLI entry point."""
+    # Bare 'sia start' / 'sia init' run with their defaults, so skip building
+    # the parser; anything else (options, --help) goes through argparse
+    if len(sys.argv) == 2 and sys.argv[1] in _DEFAULT_COMMANDS:
+        _DEFAULT_COMMANDS[sys.argv[1]]()
+        return
+
     parser = argparse.ArgumentParser(
         prog="sia",
         description="Sia - Runtime & Control Plane for Multi-Agent AI Execution",
@@ -22,14 +31,14 @@ def main():
     start_parser = subparsers.add_parser("start", help="Start the control plane")
     start_parser.add_argument(
         "--host",
-        default="127.0.0.1",
-        help="Host to bind to (default: 127.0.0.1)",
+        default=DEFAULT_HOST,
+        help=f"Host to bind to (default: {DEFAULT_HOST})",
     )
     start_parser.add_argument(
         "--port",
         type=int,
-        default=8000,
-        help="Port to bind to (default: 8000)",
+        default=DEFAULT_PORT,
+        help=f"Port to bind to (default: {DEFAULT_PORT})",
     )
     start_parser.add_argument(
         "--no-browser",
@@ -42,14 +51,14 @@ def main():
     init_parser.add_argument(
         "--port",
         type=int,
-        default=8000,
-        help="Port where Sia control plane runs (default: 8000)",
+        default=DEFAULT_PORT,
+        help=f"Port where Sia control plane runs (default: {DEFAULT_PORT})",
     )
     init_parser.add_argument(
         "--editor",
         choices=["claude", "cursor", "both"],
-        default="both",
-        help="Which editor to configure (default: both)",
+        default=DEFAULT_EDITOR,
+        help=f"Which editor to configure (default: {DEFAULT_EDITOR})",
     )
 
     args = parser.parse_args()
@@ -65,6 +74,8 @@ def main():
 
 def start_server(host: str, port: int, open_browser: bool):
     """Start the control plane server."""
+    from threading import Thread
+
     import uvicorn
 
     print(f"\n  Sia Control Plane")
@@ -74,8 +85,8 @@ def start_server(host: str, port: int, open_browser: bool):
     print(f"\n  Waiting for agents to connect...\n")
 
     if open_browser:
-        # Open browser after short delay to let server start
-        Timer(1.5, lambda: webbrowser.open(f"http://{host}:{port}")).start()
+        # Open browser once the server is accepting requests
+        Thread(target=_open_browser_when_ready, args=(f"http://{host}:{port}",), daemon=True).start()
 
     uvicorn.run(
         "sia.main:app",
@@ -85,7 +96,30 @@ def start_server(host: str, port: int, open_browser: bool):
     )
 
 
-def init_hooks(port: int = 8000, editor: str = "both"):
+def _open_browser_when_ready(url: str, timeout: float = 10.0):
+    """Poll the health endpoint, then open the dashboard."""
+    import webbrowser
+
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    delay = 0.01
+    # One client for every probe so they share a connection
+    with httpx.Client(base_url=url, timeout=1.0) as client:
+        while time.monotonic() < deadline:
+            try:
+                if client.get("/health").status_code == 200:
+                    break
+            except httpx.HTTPError:
+                pass
+            # Back off from 10ms up to 200ms between probes
+            time.sleep(delay)
+            delay = min(delay * 2, 0.2)
+
+    webbrowser.open(url)
+
+
+def init_hooks(port: int = DEFAULT_PORT, editor: str = DEFAULT_EDITOR):
     """Initialize Sia for AI code editors (Claude Code and/or Cursor)."""
     project_dir = Path.cwd()
     api_url = f"http://localhost:{port}"
@@ -100,25 +134,27 @@ def init_hooks(port: int = 8000, editor: str = "both"):
     if editor in ("cursor", "both"):
         configured.append(init_cursor(project_dir, api_url, port))
 
-    # Print summary
-    print(f"\n  Sia Initialized!")
-    print(f"  ================")
+    # Print summary as one write so it isn't interleaved when piped
+    lines = [f"\n  Sia Initialized!", f"  ================"]
     for config in configured:
-        print(f"  {config}")
-    print(f"")
-    print(f"  Usage:")
-    print(f"    1. Run 'sia start --port {port}' to launch control plane")
+        lines.append(f"  {config}")
+    lines.append(f"")
+    lines.append(f"  Usage:")
+    lines.append(f"    1. Run 'sia start --port {port}' to launch control plane")
     if editor in ("claude", "both"):
-        print(f"    2. Use Claude Code in this project - activity auto-tracked")
+        lines.append(f"    2. Use Claude Code in this project - activity auto-tracked")
     if editor in ("cursor", "both"):
-        print(f"    2. Use Cursor in this project - activity auto-tracked")
-    print(f"")
-    print(f"  Dashboard: http://localhost:{port}")
-    print()
+        lines.append(f"    2. Use Cursor in this project - activity auto-tracked")
+    lines.append(f"")
+    lines.append(f"  Dashboard: http://localhost:{port}")
+    lines.append(f"")
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
 def init_claude_code(project_dir: Path, api_url: str, port: int) -> str:
     """Initialize Claude Code hooks."""
+    import json
+
     hooks_dir = project_dir / ".claude" / "hooks"
     hooks_dir.mkdir(parents=True, exist_ok=True)
 
@@ -128,14 +164,14 @@ def init_claude_code(project_dir: Path, api_url: str, port: int) -> str:
     hook_script = hooks_dir / "sia-hook.sh"
     hook_content = f'''#!/bin/bash
 # Sia Hook - Reports tool usage to control plane
+# Claude Code's hook JSON is forwarded as-is, so no interpreter is started
 input_data=$(cat)
 if [ -n "$input_data" ]; then
-    # JSON-escape the input using python
-    escaped=$(echo "$input_data" | python -c "import sys,json; print(json.dumps(sys.stdin.read()))")
-    curl -s -X POST "{tool_use_url}" \\
+    # Report in the background so the tool call doesn't wait on the control plane
+    printf '%s' "$input_data" | curl -s -X POST "{tool_use_url}" \\
         -H "Content-Type: application/json" \\
-        -d "{{\\"hook_type\\":\\"$CLAUDE_HOOK_TYPE\\",\\"session_id\\":\\"$CLAUDE_SESSION_ID\\",\\"working_directory\\":\\"$CLAUDE_WORKING_DIRECTORY\\",\\"tool_data\\":$escaped}}" \\
-        --max-time 2 2>/dev/null || true
+        --data-binary @- \\
+        --max-time 2 >/dev/null 2>&1 &
 fi
 '''
 
@@ -153,13 +189,13 @@ fi
     # Create Claude settings with hooks
     settings_path = project_dir / ".claude" / "settings.json"
 
+    # A missing settings file is just an IOError, so skip the exists() check
     existing_settings = {}
-    if settings_path.exists():
-        try:
-            with open(settings_path, "r") as f:
-                existing_settings = json.load(f)
-        except (json.JSONDecodeError, IOError):
-            pass
+    try:
+        with open(settings_path, "r") as f:
+            existing_settings = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        pass
 
     if "hooks" not in existing_settings:
         existing_settings["hooks"] = {}
@@ -171,14 +207,18 @@ fi
         }
     ]
 
+    # json.dump writes each encoder chunk separately; serialize first and
+    # write the file in one call
     with open(settings_path, "w") as f:
-        json.dump(existing_settings, f, indent=2)
+        f.write(json.dumps(existing_settings, indent=2))
 
     return f"Claude Code: {settings_path}"
 
 
 def init_cursor(project_dir: Path, api_url: str, port: int) -> str:
     """Initialize Cursor with .cursorrules for Sia integration."""
+    import json
+
     cursor_dir = project_dir / ".cursor"
     cursor_dir.mkdir(parents=True, exist_ok=True)
 
@@ -231,10 +271,17 @@ When setting up a plan, report it:
     }
 
     with open(mcp_config_path, "w") as f:
-        json.dump(mcp_config, f, indent=2)
+        f.write(json.dumps(mcp_config, indent=2))
 
     return f"Cursor: {cursorrules_path}"
 
 
+# Subcommands that take no arguments -> their default invocation
+_DEFAULT_COMMANDS = {
+    "start": lambda: start_server(DEFAULT_HOST, DEFAULT_PORT, True),
+    "init": lambda: init_hooks(DEFAULT_PORT, DEFAULT_EDITOR),
+}
+
+
 if __name__ == "__main__":
     main()
@@ -4,47 +4,78 @@ This script is called by Claude Code hooks after each tool use.
 It receives tool information via stdin as JSON and reports to Sia.
 """
 
+import http.client
 import sys
-import json
-import httpx
+import orjson
 import os
+from urllib.parse import urlsplit
 
 CONTROL_PLANE = os.environ.get("SIA_CONTROL_PLANE", "http://localhost:8000")
+TOOL_USE_URL = f"{CONTROL_PLANE}/api/hooks/tool-use"
+
+# Each hook invocation is a fresh process that sends one request, so there is
+# no connection to reuse; stdlib http.client skips importing httpx and building
+# its SSL context. Fail fast when the control plane isn't running.
+CONNECT_TIMEOUT = 1.0
+SEND_TIMEOUT = 5.0
+
+# The control plane keeps only the first 1000 characters of tool output
+MAX_OUTPUT_CHARS = 1000
 
 
 def report_tool_use(data: dict) -> None:
     """Report a tool use to the control plane."""
+    url = urlsplit(TOOL_USE_URL)
+    if url.scheme == "https":
+        conn = http.client.HTTPSConnection(url.hostname, url.port, timeout=CONNECT_TIMEOUT)
+    else:
+        conn = http.client.HTTPConnection(url.hostname, url.port, timeout=CONNECT_TIMEOUT)
     try:
-        with httpx.Client(timeout=5.0) as client:
-            client.post(f"{CONTROL_PLANE}/api/hooks/tool-use", json=data)
+        conn.connect()
+        conn.sock.settimeout(SEND_TIMEOUT)
+        # Fire and forget: the response is never used, so close as soon as the
+        # request is sent instead of holding up the tool call for the reply.
+        # The server still handles a request whose body arrived in full.
+        conn.request(
+            "POST",
+            url.path,
+            body=orjson.dumps(data),
+            headers={"content-type": "application/json"},
+        )
     except Exception:
         # Fail silently - don't interrupt Claude Code
         pass
+    finally:
+        conn.close()
 
 
 def main():
     """Main entry point for the hook script."""
-    # Read JSON from stdin
+    # Read JSON from stdin as raw bytes; orjson decodes UTF-8 itself
     try:
-        input_data = sys.stdin.read()
+        input_data = sys.stdin.buffer.read()
         if not input_data.strip():
             return
 
-        data = json.loads(input_data)
+        data = orjson.loads(input_data)
+
+        tool_output = data.get("tool_output", "")
+        if isinstance(tool_output, str) and len(tool_output) > MAX_OUTPUT_CHARS:
+            tool_output = tool_output[:MAX_OUTPUT_CHARS]
 
         # Extract relevant info from hook payload
         hook_payload = {
             "hook_type": os.environ.get("CLAUDE_HOOK_TYPE", "unknown"),
             "tool_name": data.get("tool_name", ""),
             "tool_input": data.get("tool_input", {}),
-            "tool_output": data.get("tool_output", ""),
+            "tool_output": tool_output,
             "session_id": os.environ.get("CLAUDE_SESSION_ID", ""),
             "working_directory": os.environ.get("CLAUDE_WORKING_DIRECTORY", os.getcwd()),
         }
 
         report_tool_use(hook_payload)
 
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         pass
     except Exception:
         pass
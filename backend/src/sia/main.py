@@ -1,12 +1,24 @@
 """Sia Control Plane - FastAPI Application."""
 
+import asyncio
+import heapq
+import logging
+import mimetypes
+import operator
+import sys
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Optional
+
+import orjson
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
-from pathlib import Path
+from fastapi.responses import FileResponse, Response
+from pydantic import AliasChoices, BaseModel, Field, TypeAdapter
 
-from typing import Any, Optional
 from .models import (
     RegisterAgentRequest,
     UpdateStateRequest,
@@ -43,24 +55,53 @@ from .models import (
     WorkspaceMapResponse,
     WorkspaceNodeType,
     WorkspaceEdgeType,
+    AGENT_LIST_ADAPTER,
+    STEP_LOG_LIST_ADAPTER,
+    WORK_UNIT_LIST_ADAPTER,
+    RUN_LIST_ADAPTER,
+    RUN_WITH_SPANS_ADAPTER,
+    TIMELINE_ADAPTER,
+    AGENT_GRAPH_ADAPTER,
+    WORKSPACE_MAP_ADAPTER,
+    elapsed_ms,
 )
 from .registry import registry
-from pydantic import BaseModel
 
 
 class HookPayload(BaseModel):
     """Payload from Claude Code hooks."""
-    hook_type: str = "unknown"
+    # Claude Code's own hook JSON names this hook_event_name
+    hook_type: str = Field(
+        default="unknown", validation_alias=AliasChoices("hook_type", "hook_event_name")
+    )
     tool_name: str = ""
     tool_input: dict[str, Any] = {}
     tool_output: str = ""
     session_id: str = ""
     working_directory: str = ""
     tool_data: str = ""  # Raw tool data from hook script
-
-
-# Track session_id -> agent_id mapping
-_session_agents: dict[str, str] = {}
+    # Field names of Claude Code's own hook JSON, which the hook script
+    # forwards unchanged
+    cwd: str = ""
+    tool_response: Any = None
+
+
+# Tool name -> (operation, tool_input keys that may hold the file path)
+_PATH_KEYS = ("file_path", "path")
+_FILE_PATH_KEY = ("file_path",)
+TOOL_NAME_TO_OP: dict[str, tuple[str, tuple[str, ...]]] = {
+    "Read": ("read", _PATH_KEYS),
+    "read_file": ("read", _PATH_KEYS),
+    "sia_read_file": ("read", _PATH_KEYS),
+    "Write": ("write", _PATH_KEYS),
+    "write_file": ("write", _PATH_KEYS),
+    "sia_write_file": ("write", _PATH_KEYS),
+    "Edit": ("write", _FILE_PATH_KEY),
+    "edit_file": ("write", _FILE_PATH_KEY),
+    "Bash": ("execute", ()),
+    "bash": ("execute", ()),
+    "sia_run_command": ("execute", ()),
+}
 
 # Locate static files directory (bundled frontend)
 STATIC_DIR = Path(__file__).parent / "static"
@@ -72,9 +113,6 @@ app = FastAPI(
 )
 
 # Enable logging for debugging
-import logging
-import asyncio
-from datetime import datetime, timedelta
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("sia")
 
@@ -90,26 +128,56 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress the larger polled JSON responses (agents, work units, runs)
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+
+# Hook agents ordered by when they go stale: (monotonic deadline, agent_id).
+# Entries are re-armed lazily from the agent's last activity when they come
+# due, so touching an agent never has to reorder the heap.
+_expiry_heap: list[tuple[float, str]] = []
+_expiry_wake = asyncio.Event()
+
+
+def _schedule_expiry(agent_id: str, active_at: float) -> None:
+    """Queue a hook agent for stale-session cleanup."""
+    heapq.heappush(_expiry_heap, (active_at + STALE_SESSION_TIMEOUT, agent_id))
+    _expiry_wake.set()
+
 
 async def cleanup_stale_sessions():
     """Background task to remove inactive agents."""
     while True:
-        await asyncio.sleep(10)  # Check every 10 seconds
+        if not _expiry_heap:
+            # Nothing to expire - sleep until an agent is scheduled
+            _expiry_wake.clear()
+            await _expiry_wake.wait()
+            continue
+
+        deadline, agent_id = _expiry_heap[0]
+        delay = deadline - time.monotonic()
+        if delay > 0:
+            _expiry_wake.clear()
+            try:
+                await asyncio.wait_for(_expiry_wake.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        heapq.heappop(_expiry_heap)
         try:
-            cutoff = datetime.utcnow() - timedelta(seconds=STALE_SESSION_TIMEOUT)
-            agents = registry.list_all()
-            for agent in agents:
-                if agent.source.value == "hooks" and agent.last_activity < cutoff:
-                    # Remove stale agent
-                    session_to_remove = None
-                    for sid, aid in list(_session_agents.items()):
-                        if aid == agent.id:
-                            session_to_remove = sid
-                            break
-                    if session_to_remove:
-                        del _session_agents[session_to_remove]
-                    registry.remove(agent.id)
-                    logger.info(f"[Cleanup] Removed stale agent {agent.name} (inactive for {STALE_SESSION_TIMEOUT}s)")
+            agent = registry.get(agent_id)
+            if not agent:
+                continue  # Already removed
+            expires_at = agent.active_at + STALE_SESSION_TIMEOUT
+            if expires_at > time.monotonic():
+                # Active since it was scheduled - re-arm
+                heapq.heappush(_expiry_heap, (expires_at, agent_id))
+                continue
+
+            # Remove stale agent
+            registry.remove(agent.id)
+            logger.info(f"[Cleanup] Removed stale agent {agent.name} (inactive for {STALE_SESSION_TIMEOUT}s)")
         except Exception as e:
             logger.error(f"[Cleanup] Error: {e}")
 
@@ -121,10 +189,32 @@ async def startup_event():
 
 
 # Health check
+# Constant body, encoded once; probed by the CLI and external monitors
+_HEALTH_BODY = orjson.dumps({"status": "ok", "service": "sia-control-plane"})
+
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint."""
-    return {"status": "ok", "service": "sia-control-plane"}
+    return Response(content=_HEALTH_BODY, media_type="application/json")
+
+
+def _json_response(adapter: TypeAdapter, value: Any) -> Response:
+    """Encode a response model straight to JSON bytes.
+
+    Returning a Response skips FastAPI's re-validation of the result, which
+    for a sync route is a second trip through the threadpool.
+    """
+    return Response(content=adapter.dump_json(value), media_type="application/json")
+
+
+def _orjson_response(content: dict) -> Response:
+    """Encode a plain dict result with orjson.
+
+    Routes without a response_model otherwise go through jsonable_encoder
+    and json.dumps.
+    """
+    return Response(content=orjson.dumps(content), media_type="application/json")
 
 
 # Agent API - used by SiaAgent instances to report their activity
@@ -138,7 +228,10 @@ async def register_agent(request: RegisterAgentRequest):
         model=request.model,
         source=request.source,
     )
-    return AgentResponse(**agent.model_dump())
+    # Hook agents expire when idle however they were registered
+    if agent.source is AgentSource.HOOKS:
+        _schedule_expiry(agent.id, agent.active_at)
+    return AgentResponse.model_validate(agent)
 
 
 @app.post("/api/agents/{agent_id}/state", response_model=AgentResponse)
@@ -152,7 +245,7 @@ async def update_agent_state(agent_id: str, request: UpdateStateRequest):
     )
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
-    return AgentResponse(**agent.model_dump())
+    return AgentResponse.model_validate(agent)
 
 
 @app.post("/api/agents/{agent_id}/tools", response_model=ToolCallResponse)
@@ -168,7 +261,7 @@ async def report_tool_call(agent_id: str, request: ReportToolCallRequest):
     )
     if not tool_call:
         raise HTTPException(status_code=404, detail="Agent not found")
-    return ToolCallResponse(**tool_call.model_dump())
+    return ToolCallResponse.model_validate(tool_call)
 
 
 # Plan API - manage agent plans
@@ -179,27 +272,7 @@ async def set_agent_plan(agent_id: str, request: SetPlanRequest):
     plan = registry.set_plan(agent_id=agent_id, steps=request.steps)
     if not plan:
         raise HTTPException(status_code=404, detail="Agent not found")
-    return PlanResponse(
-        steps=[PlanStepResponse(
-            id=s.id,
-            index=s.index,
-            description=s.description,
-            status=s.status,
-            files=s.files,
-            logs=[StepLogResponse(**log.model_dump()) for log in s.logs],
-            started_at=s.started_at,
-            completed_at=s.completed_at,
-            owner=s.owner,
-            resources=s.resources,
-            artifacts=s.artifacts,
-            reason=s.reason,
-            confidence=s.confidence,
-            blocked_by=s.blocked_by,
-            can_parallel=s.can_parallel,
-        ) for s in plan.steps],
-        current_step_index=plan.current_step_index,
-        created_at=plan.created_at,
-    )
+    return PlanResponse.model_validate(plan)
 
 
 @app.post("/api/agents/{agent_id}/steps/{step_index}/status", response_model=PlanStepResponse)
@@ -213,23 +286,7 @@ async def update_step_status(agent_id: str, step_index: int, request: UpdateStep
     )
     if not step:
         raise HTTPException(status_code=404, detail="Agent or step not found")
-    return PlanStepResponse(
-        id=step.id,
-        index=step.index,
-        description=step.description,
-        status=step.status,
-        files=step.files,
-        logs=[StepLogResponse(**log.model_dump()) for log in step.logs],
-        started_at=step.started_at,
-        completed_at=step.completed_at,
-        owner=step.owner,
-        resources=step.resources,
-        artifacts=step.artifacts,
-        reason=step.reason,
-        confidence=step.confidence,
-        blocked_by=step.blocked_by,
-        can_parallel=step.can_parallel,
-    )
+    return PlanStepResponse.model_validate(step)
 
 
 @app.post("/api/agents/{agent_id}/steps/{step_index}/logs", response_model=StepLogResponse)
@@ -243,7 +300,17 @@ async def add_step_log(agent_id: str, step_index: int, request: AddStepLogReques
     )
     if not log:
         raise HTTPException(status_code=404, detail="Agent or step not found")
-    return StepLogResponse(**log.model_dump())
+    return StepLogResponse.model_validate(log)
+
+
+@app.get("/api/agents/{agent_id}/steps/{step_index}/logs", response_model=list[StepLogResponse])
+async def get_step_logs(agent_id: str, step_index: int, offset: int = 0, limit: int = 100):
+    """Page through a step's retained logs (the newest MAX_STEP_LOGS), oldest first."""
+    step = registry.get_step(agent_id, step_index)
+    if not step:
+        raise HTTPException(status_code=404, detail="Agent or step not found")
+    logs = step.logs[max(offset, 0):max(offset, 0) + max(limit, 0)]
+    return _json_response(STEP_LOG_LIST_ADAPTER, STEP_LOG_LIST_ADAPTER.validate_python(logs))
 
 
 # Work Units API - track resources being worked on
@@ -252,55 +319,59 @@ async def add_step_log(agent_id: str, step_index: int, request: AddStepLogReques
 async def list_work_units():
     """List all active work units across all agents."""
     work_units = registry.list_work_units()
-    return [WorkUnitResponse(**wu.model_dump()) for wu in work_units]
+    return _json_response(WORK_UNIT_LIST_ADAPTER, WORK_UNIT_LIST_ADAPTER.validate_python(work_units))
 
 
 @app.get("/api/agents/{agent_id}/work-units", response_model=list[WorkUnitResponse])
 async def get_agent_work_units(agent_id: str):
     """Get work units for a specific agent."""
     work_units = registry.get_agent_work_units(agent_id)
-    return [WorkUnitResponse(**wu.model_dump()) for wu in work_units]
+    return _json_response(WORK_UNIT_LIST_ADAPTER, WORK_UNIT_LIST_ADAPTER.validate_python(work_units))
 
 
 # Hooks API - receives automatic reports from Claude Code hooks
 
-@app.post("/api/hooks/tool-use")
-async def hook_tool_use(payload: HookPayload):
-    """Handle tool use reports from Claude Code hooks."""
-    import json as json_module
-
+def _process_hook_event(payload: HookPayload) -> dict:
+    """Apply a single hook report to the registry."""
     session_id = payload.session_id or "default"
 
     # Parse tool_data from hook script
     tool_name = payload.tool_name
     tool_input = payload.tool_input
     tool_output = payload.tool_output
+    if not tool_output and payload.tool_response is not None:
+        response = payload.tool_response
+        tool_output = response if isinstance(response, str) else orjson.dumps(response).decode()
 
     if payload.tool_data:
         try:
-            data = json_module.loads(payload.tool_data)
+            data = orjson.loads(payload.tool_data)
             tool_name = data.get("tool_name") or data.get("tool") or data.get("name") or tool_name
             tool_input = data.get("tool_input") or data.get("input") or tool_input or {}
-            tool_output = str(data.get("tool_output") or data.get("output") or tool_output or "")
-        except (json_module.JSONDecodeError, TypeError):
-            tool_output = payload.tool_data[:500] if not tool_output else tool_output
+            output = data.get("tool_output") or data.get("output") or tool_output or ""
+            tool_output = output if isinstance(output, str) else str(output)
+        except (orjson.JSONDecodeError, TypeError):
+            if not tool_output:
+                raw = payload.tool_data
+                tool_output = raw[:500] if len(raw) > 500 else raw
 
     if not tool_name:
         logger.warning(f"[Hook] No tool name - raw data: {payload.tool_data[:100] if payload.tool_data else 'empty'}")
         return {"status": "skipped", "reason": "no tool name"}
 
-    logger.info(f"[Hook] {tool_name} | session={session_id[:8]}...")
+    # Names arrive fresh from JSON; intern them so dispatch compares by identity
+    tool_name = sys.intern(tool_name)
+    sid_short = session_id[:8]
+    logger.info(f"[Hook] {tool_name} | session={sid_short}...")
 
     # Get or create agent for this session
-    if session_id not in _session_agents:
+    agent = registry.get_by_session(session_id)
+    if agent is None:
         # Auto-register agent for this session
-        working_dir = payload.working_directory or ""
-        dir_name = "unknown"
-        if working_dir:
-            parts = working_dir.replace("\\", "/").split("/")
-            dir_name = parts[-1] if parts else "unknown"
+        working_dir = payload.working_directory or payload.cwd
+        dir_name = working_dir.replace("\\", "/").rpartition("/")[2] if working_dir else "unknown"
         task = f"Session in {dir_name}"
-        agent_name = f"claude-{session_id[:8]}" if session_id != "default" else "claude-session"
+        agent_name = f"claude-{sid_short}" if session_id != "default" else "claude-session"
         agent = registry.register(
             task=task,
             name=agent_name,
@@ -308,12 +379,11 @@ async def hook_tool_use(payload: HookPayload):
             source="hooks",
             session_id=session_id,
             working_directory=working_dir,
+            state="running",
         )
-        _session_agents[session_id] = agent.id
-        registry.update_state(agent.id, "running")
+        _schedule_expiry(agent.id, agent.active_at)
         logger.info(f"[Agent Connected] {agent_name} | dir={dir_name} | id={agent.id}")
-
-    agent_id = _session_agents[session_id]
+    agent_id = agent.id
 
     # Update last activity
     registry.touch(agent_id)
@@ -326,51 +396,65 @@ async def hook_tool_use(payload: HookPayload):
             if steps:
                 registry.set_plan(agent_id, steps)
                 # Update step statuses based on todo statuses
-                for i, todo in enumerate(todos, 1):
-                    status = todo.get("status", "pending")
-                    if status == "in_progress":
-                        registry.update_step(agent_id, i, "in_progress")
-                    elif status == "completed":
-                        registry.update_step(agent_id, i, "completed")
+                changes = [
+                    (i, status)
+                    for i, todo in enumerate(todos, 1)
+                    if (status := todo.get("status")) in ("in_progress", "completed")
+                ]
+                if changes:
+                    registry.update_steps_bulk(agent_id, changes)
 
     # Track file operations as work units
     file_path = None
     operation = "unknown"
 
-    if tool_name in ("Read", "read_file", "sia_read_file"):
-        file_path = tool_input.get("file_path") or tool_input.get("path")
-        operation = "read"
-    elif tool_name in ("Write", "write_file", "sia_write_file"):
-        file_path = tool_input.get("file_path") or tool_input.get("path")
-        operation = "write"
-    elif tool_name in ("Edit", "edit_file"):
-        file_path = tool_input.get("file_path")
-        operation = "write"
-    elif tool_name in ("Bash", "bash", "sia_run_command"):
-        operation = "execute"
+    op_info = TOOL_NAME_TO_OP.get(tool_name)
+    if op_info:
+        operation, path_keys = op_info
+        for key in path_keys:
+            file_path = tool_input.get(key)
+            if file_path:
+                break
 
     if file_path:
         registry.track_file_access(agent_id, file_path, operation)
 
-    # Record the tool call
+    # Record the tool call, truncating long outputs
+    if not tool_output:
+        tool_output = ""
+    elif len(tool_output) > 1000:
+        tool_output = tool_output[:1000]
     registry.add_tool_call(
         agent_id=agent_id,
         tool_name=tool_name,
         tool_input=tool_input,
-        tool_output=tool_output[:1000] if tool_output else "",  # Truncate long outputs
+        tool_output=tool_output,
         duration_ms=0,  # Hooks don't have timing info
     )
 
     return {"status": "ok", "agent_id": agent_id}
 
 
+@app.post("/api/hooks/tool-use")
+async def hook_tool_use(payload: HookPayload):
+    """Handle tool use reports from Claude Code hooks."""
+    return _orjson_response(_process_hook_event(payload))
+
+
+@app.post("/api/hooks/tool-use/batch")
+async def hook_tool_use_batch(payloads: list[HookPayload]):
+    """Handle several tool use reports in one request, in order."""
+    results = [_process_hook_event(payload) for payload in payloads]
+    return _orjson_response({"status": "ok", "results": results})
+
+
 # UI API - used by the frontend to observe agents
 
 @app.get("/api/agents", response_model=list[AgentResponse])
 async def list_agents():
     """List all registered agents."""
     agents = registry.list_all()
-    return [AgentResponse(**a.model_dump()) for a in agents]
+    return _json_response(AGENT_LIST_ADAPTER, AGENT_LIST_ADAPTER.validate_python(agents))
 
 
 @app.get("/api/agents/{agent_id}", response_model=AgentResponse)
@@ -379,21 +463,12 @@ async def get_agent(agent_id: str):
     agent = registry.get(agent_id)
     if not agent:
         raise HTTPException(status_code=404, detail="Agent not found")
-    return AgentResponse(**agent.model_dump())
+    return AgentResponse.model_validate(agent)
 
 
 @app.delete("/api/agents/{agent_id}")
 async def remove_agent(agent_id: str):
     """Remove an agent by ID."""
-    # Also remove from session mapping
-    session_to_remove = None
-    for sid, aid in _session_agents.items():
-        if aid == agent_id:
-            session_to_remove = sid
-            break
-    if session_to_remove:
-        del _session_agents[session_to_remove]
-
     if registry.remove(agent_id):
         logger.info(f"[Agent Removed] id={agent_id}")
         return {"status": "ok", "agent_id": agent_id}
@@ -403,11 +478,9 @@ async def remove_agent(agent_id: str):
 @app.delete("/api/sessions/{session_id}")
 async def remove_session(session_id: str):
     """Remove an agent by session ID."""
-    if session_id in _session_agents:
-        agent_id = _session_agents[session_id]
-        del _session_agents[session_id]
-        registry.remove(agent_id)
-        logger.info(f"[Session Removed] session={session_id[:8]}... agent={agent_id}")
+    agent = registry.get_by_session(session_id)
+    if agent is not None and registry.remove(agent.id):
+        logger.info(f"[Session Removed] session={session_id[:8]}... agent={agent.id}")
         return {"status": "ok", "session_id": session_id}
     raise HTTPException(status_code=404, detail="Session not found")
 
@@ -415,65 +488,36 @@ async def remove_session(session_id: str):
 # =====================================
 # Tracing API - Runs and Spans
 # =====================================
+#
+# The per-run views walk every span in a trace, so they are declared as plain
+# `def` and FastAPI runs them in its threadpool instead of on the event loop.
+
+# Span/Run already hold validated data, so responses are built with
+# model_construct from a precomputed field list instead of re-validating.
+_SPAN_RESPONSE_FIELDS = tuple(SpanResponse.model_fields)
+_RUN_RESPONSE_FIELDS = tuple(RunResponse.model_fields)
 
-def _span_to_response(span, children: list = None) -> SpanResponse:
+
+def _span_to_response(span) -> SpanResponse:
     """Convert a Span model to SpanResponse."""
-    return SpanResponse(
-        id=span.id,
-        trace_id=span.trace_id,
-        parent_id=span.parent_id,
-        kind=span.kind,
-        name=span.name,
-        status=span.status,
-        start_time=span.start_time,
-        end_time=span.end_time,
-        duration_ms=span.duration_ms,
-        agent_id=span.agent_id,
-        step_index=span.step_index,
-        blocked_by_span_id=span.blocked_by_span_id,
-        blocked_by_resource=span.blocked_by_resource,
-        blocked_duration_ms=span.blocked_duration_ms,
-        attributes=span.attributes,
-        error_message=span.error_message,
-        file_path=span.file_path,
-        operation=span.operation,
-        children=children or [],
+    return SpanResponse.model_construct(
+        **{f: getattr(span, f) for f in _SPAN_RESPONSE_FIELDS}
     )
 
 
 def _run_to_response(run) -> RunResponse:
     """Convert a Run model to RunResponse."""
-    return RunResponse(
-        id=run.id,
-        trace_id=run.trace_id,
-        name=run.name,
-        status=run.status,
-        start_time=run.start_time,
-        end_time=run.end_time,
-        duration_ms=run.duration_ms,
-        root_agent_id=run.root_agent_id,
-        agent_ids=run.agent_ids,
-        total_spans=run.total_spans,
-        completed_spans=run.completed_spans,
-        failed_spans=run.failed_spans,
-        blocked_spans=run.blocked_spans,
-        max_concurrency=run.max_concurrency,
-        files_touched=run.files_touched,
-        planned_steps=run.planned_steps,
-        executed_steps=run.executed_steps,
+    return RunResponse.model_construct(
+        **{f: getattr(run, f) for f in _RUN_RESPONSE_FIELDS}
     )
 
 
-def _build_span_tree(spans: list, parent_id: str = None) -> list[SpanResponse]:
-    """Build a tree structure from flat span list."""
-    children = []
+def _build_span_tree_index(spans: list) -> dict[str, list[str]]:
+    """Map each parent span ID to its child span IDs, in span order."""
+    children: dict[str, list[str]] = {}
     for span in spans:
-        if span.parent_id == parent_id:
-            child_response = _span_to_response(
-                span,
-                children=_build_span_tree(spans, span.id)
-            )
-            children.append(child_response)
+        if span.parent_id:
+            children.setdefault(span.parent_id, []).append(span.id)
     return children
 
 
@@ -481,11 +525,11 @@ def _build_span_tree(spans: list, parent_id: str = None) -> list[SpanResponse]:
 async def list_runs():
     """List all runs, newest first."""
     runs = registry.list_runs()
-    return [_run_to_response(r) for r in runs]
+    return _json_response(RUN_LIST_ADAPTER, [_run_to_response(r) for r in runs])
 
 
 @app.get("/api/runs/{run_id}", response_model=RunWithSpansResponse)
-async def get_run(run_id: str):
+def get_run(run_id: str):
     """Get a run with all its spans."""
     run = registry.get_run(run_id)
     if not run:
@@ -494,21 +538,20 @@ async def get_run(run_id: str):
     spans = registry.get_spans_for_trace(run.trace_id)
     flat_spans = [_span_to_response(s) for s in spans]
 
-    # Build tree structure
-    root_span = None
-    tree_spans = _build_span_tree(spans, None)
-    if tree_spans:
-        root_span = tree_spans[0]
-
-    return RunWithSpansResponse(
+    # The tree is sent as a parent -> children index over the flat list
+    # rather than as nested span copies
+    return _json_response(RUN_WITH_SPANS_ADAPTER, RunWithSpansResponse(
         run=_run_to_response(run),
         spans=flat_spans,
-        root_span=root_span,
-    )
+        children=_build_span_tree_index(spans),
+    ))
+
+
+_TIMESTAMP = operator.attrgetter("timestamp")
 
 
 @app.get("/api/runs/{run_id}/timeline", response_model=TimelineResponse)
-async def get_run_timeline(run_id: str):
+def get_run_timeline(run_id: str):
     """Get timeline events for a run."""
     run = registry.get_run(run_id)
     if not run:
@@ -563,21 +606,21 @@ async def get_run_timeline(run_id: str):
             ))
 
     # Sort by timestamp
-    events.sort(key=lambda e: e.timestamp)
+    events.sort(key=_TIMESTAMP)
 
     # Get unique agent IDs
     agent_ids = list(set(e.agent_id for e in events if e.agent_id))
 
-    return TimelineResponse(
+    return _json_response(TIMELINE_ADAPTER, TimelineResponse(
         start_time=run.start_time,
         end_time=run.end_time,
         events=events,
         agents=agent_ids,
-    )
+    ))
 
 
 @app.get("/api/runs/{run_id}/plan-comparison", response_model=PlanComparisonResponse)
-async def get_plan_comparison(run_id: str):
+def get_plan_comparison(run_id: str):
     """Get plan vs execution comparison for a run."""
     run = registry.get_run(run_id)
     if not run:
@@ -601,42 +644,53 @@ async def get_plan_comparison(run_id: str):
             has_divergence=False,
         )
 
-    planned = [s.description for s in agent.plan.steps]
-    executed = [s.description for s in agent.plan.steps if s.status in ("completed", "in_progress")]
+    # One sweep over the plan; the index dicts record each description's
+    # first position and double as membership sets.
+    planned: list[str] = []
+    executed: list[str] = []
+    planned_idx: dict[str, int] = {}
+    executed_idx: dict[str, int] = {}
+    for s in agent.plan.steps:
+        planned_idx.setdefault(s.description, len(planned))
+        planned.append(s.description)
+        if s.status in ("completed", "in_progress"):
+            executed_idx.setdefault(s.description, len(executed))
+            executed.append(s.description)
 
     # Calculate divergences
     divergences = []
-    planned_set = set(planned)
-    executed_set = set(executed)
+    has_divergence = False
 
     for i, step in enumerate(planned):
-        if step in executed_set:
-            exec_idx = executed.index(step) if step in executed else None
-            if exec_idx != i:
-                divergences.append(PlanDivergence(
-                    step_description=step,
-                    planned_index=i,
-                    executed_index=exec_idx,
-                    status="reordered"
-                ))
-            else:
-                divergences.append(PlanDivergence(
-                    step_description=step,
-                    planned_index=i,
-                    executed_index=exec_idx,
-                    status="executed"
-                ))
-        else:
+        exec_idx = executed_idx.get(step)
+        if exec_idx is None:
+            has_divergence = True
             divergences.append(PlanDivergence(
                 step_description=step,
                 planned_index=i,
                 executed_index=None,
                 status="skipped"
             ))
+        elif exec_idx != i:
+            has_divergence = True
+            divergences.append(PlanDivergence(
+                step_description=step,
+                planned_index=i,
+                executed_index=exec_idx,
+                status="reordered"
+            ))
+        else:
+            divergences.append(PlanDivergence(
+                step_description=step,
+                planned_index=i,
+                executed_index=exec_idx,
+                status="executed"
+            ))
 
     # Check for inserted steps
     for i, step in enumerate(executed):
-        if step not in planned_set:
+        if step not in planned_idx:
+            has_divergence = True
             divergences.append(PlanDivergence(
                 step_description=step,
                 planned_index=None,
@@ -644,8 +698,6 @@ async def get_plan_comparison(run_id: str):
                 status="inserted"
             ))
 
-    has_divergence = any(d.status != "executed" for d in divergences)
-
     return PlanComparisonResponse(
         planned_steps=planned,
         executed_steps=executed,
@@ -663,18 +715,32 @@ async def get_span(span_id: str):
     return _span_to_response(span)
 
 
+# The graph endpoints are polled by the UI while usually nothing changes, so
+# their encoded bodies are memoized per (run, registry version); any registry
+# change bumps the version and the next poll rebuilds.
+
 @app.get("/api/runs/{run_id}/agent-graph", response_model=AgentGraphResponse)
-async def get_agent_graph(run_id: str):
+def get_agent_graph(run_id: str):
     """Get agent interaction graph for a run."""
+    body = _agent_graph_json(run_id, registry.version)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return Response(content=body, media_type="application/json")
+
+
+@lru_cache(maxsize=64)
+def _agent_graph_json(run_id: str, version: int) -> Optional[bytes]:
+    """Build and encode the agent graph for a run, or None if it is missing."""
     run = registry.get_run(run_id)
     if not run:
-        raise HTTPException(status_code=404, detail="Run not found")
+        return None
 
     nodes = []
     edges = []
     depth_map: dict[str, int] = {}  # agent_id -> depth
     children_count: dict[str, int] = {}  # agent_id -> child count
     blocking_agents: set[str] = set()
+    run_agent_ids = set(run.agent_ids)  # O(1) parent membership checks
 
     # Build nodes from agents in this run
     for agent_id in run.agent_ids:
@@ -700,8 +766,8 @@ async def get_agent_graph(run_id: str):
 
         # Calculate duration
         duration_ms = None
-        if agent.started_at and agent.completed_at:
-            duration_ms = int((agent.completed_at - agent.started_at).total_seconds() * 1000)
+        if agent.started_at:
+            duration_ms = elapsed_ms(agent.started_at, agent.completed_at)
 
         node = AgentGraphNode(
             id=agent.id,
@@ -710,7 +776,7 @@ async def get_agent_graph(run_id: str):
             source=agent.source,
             is_root=(agent.id == run.root_agent_id),
             depth=depth,
-            tool_calls_count=len(agent.tool_calls),
+            tool_calls_count=agent.tool_call_count,
             duration_ms=duration_ms,
             started_at=agent.started_at,
             completed_at=agent.completed_at,
@@ -719,7 +785,7 @@ async def get_agent_graph(run_id: str):
         nodes.append(node)
 
         # Create spawn edge from parent to this agent
-        if agent.parent_agent_id and agent.parent_agent_id in run.agent_ids:
+        if agent.parent_agent_id and agent.parent_agent_id in run_agent_ids:
             edge = AgentGraphEdge(
                 source_id=agent.parent_agent_id,
                 target_id=agent.id,
@@ -761,20 +827,29 @@ async def get_agent_graph(run_id: str):
         bottleneck_agents=list(blocking_agents),
     )
 
-    return AgentGraphResponse(
+    return AGENT_GRAPH_ADAPTER.dump_json(AgentGraphResponse(
         nodes=nodes,
         edges=edges,
         metrics=metrics,
         root_agent_id=run.root_agent_id,
-    )
+    ))
 
 
 @app.get("/api/runs/{run_id}/workspace-map", response_model=WorkspaceMapResponse)
-async def get_workspace_map(run_id: str):
+def get_workspace_map(run_id: str):
     """Get workspace impact map for a run."""
+    body = _workspace_map_json(run_id, registry.version)
+    if body is None:
+        raise HTTPException(status_code=404, detail="Run not found")
+    return Response(content=body, media_type="application/json")
+
+
+@lru_cache(maxsize=64)
+def _workspace_map_json(run_id: str, version: int) -> Optional[bytes]:
+    """Build and encode the workspace map for a run, or None if it is missing."""
     run = registry.get_run(run_id)
     if not run:
-        raise HTTPException(status_code=404, detail="Run not found")
+        return None
 
     nodes: list[WorkspaceNode] = []
     edges: list[WorkspaceEdge] = []
@@ -785,6 +860,8 @@ async def get_workspace_map(run_id: str):
     file_operations: dict[str, set[str]] = {}  # path -> set of operations
     file_node_ids: dict[str, str] = {}  # path -> node_id
     agent_file_count: dict[str, int] = {}  # agent_id -> file count
+    # agent_id -> [(path, operation, start_time, step_index)] for edge emission
+    span_files_by_agent: dict[str, list[tuple]] = {}
 
     # Get spans with file operations
     spans = registry.get_spans_for_trace(run.trace_id)
@@ -800,6 +877,9 @@ async def get_workspace_map(run_id: str):
                 file_operations[path] = set()
             file_agents[path].add(span.agent_id)
             file_operations[path].add(operation)
+            span_files_by_agent.setdefault(span.agent_id, []).append(
+                (path, operation, span.start_time, span.step_index)
+            )
 
             # Track agent activity
             agent_file_count[span.agent_id] = agent_file_count.get(span.agent_id, 0) + 1
@@ -862,21 +942,17 @@ async def get_workspace_map(run_id: str):
         nodes.append(agent_node)
 
         # Create edges for this agent's file operations
-        for span in spans:
-            if span.agent_id == agent_id and span.file_path:
-                path = span.file_path.replace("\\", "/")
-                if path in file_node_ids:
-                    operation = span.operation or "modify"
-                    edge_type = WorkspaceEdgeType.READ if operation == "read" else WorkspaceEdgeType.WRITE
-
-                    edge = WorkspaceEdge(
-                        source_id=f"agent-{agent_id}",
-                        target_id=file_node_ids[path],
-                        edge_type=edge_type,
-                        timestamp=span.start_time,
-                        step_index=span.step_index,
-                    )
-                    edges.append(edge)
+        for path, operation, start_time, step_index in span_files_by_agent.get(agent_id, ()):
+            edge_type = WorkspaceEdgeType.READ if operation == "read" else WorkspaceEdgeType.WRITE
+
+            edge = WorkspaceEdge(
+                source_id=f"agent-{agent_id}",
+                target_id=file_node_ids[path],
+                edge_type=edge_type,
+                timestamp=start_time,
+                step_index=step_index,
+            )
+            edges.append(edge)
 
     # Calculate metrics
     most_touched_file = None
@@ -902,40 +978,49 @@ async def get_workspace_map(run_id: str):
         most_active_agent=most_active_agent,
     )
 
-    return WorkspaceMapResponse(
+    return WORKSPACE_MAP_ADAPTER.dump_json(WorkspaceMapResponse(
         nodes=nodes,
         edges=edges,
         conflicts=conflicts,
         metrics=metrics,
-    )
+    ))
 
 
 # Serve frontend static files
+INDEX_FILE = STATIC_DIR / "index.html"
+ASSETS_DIR = STATIC_DIR / "assets"
+
+# Explicit types for the bundle; some platforms' mimetypes tables get .js wrong
+for _ext, _media_type in (
+    (".js", "application/javascript"),
+    (".css", "text/css"),
+    (".json", "application/json"),
+):
+    mimetypes.add_type(_media_type, _ext)
+
+# Bundled asset names are content-hashed, so browsers may cache them forever
+_IMMUTABLE_HEADERS = {"Cache-Control": "public, max-age=31536000, immutable"}
+
+
+class _AssetFiles(StaticFiles):
+    """StaticFiles for the content-hashed bundle, marked immutable."""
+
+    def file_response(self, *args, **kwargs) -> Response:
+        response = super().file_response(*args, **kwargs)
+        response.headers.update(_IMMUTABLE_HEADERS)
+        return response
+
+
+_INDEX_EXISTS = INDEX_FILE.is_file()
+
+
 @app.get("/")
 async def serve_root():
     """Serve the frontend UI."""
-    index_file = STATIC_DIR / "index.html"
-    if index_file.exists():
-        return FileResponse(index_file, media_type="text/html")
+    if _INDEX_EXISTS:
+        return FileResponse(INDEX_FILE, media_type="text/html")
     return {"message": "Sia Control Plane API", "docs": "/docs"}
 
 
-# Serve JS files with correct MIME type
-@app.get("/assets/{filename:path}")
-async def serve_assets(filename: str):
-    """Serve static assets with correct MIME types."""
-    file_path = STATIC_DIR / "assets" / filename
-    if not file_path.exists():
-        raise HTTPException(status_code=404, detail="Asset not found")
-
-    # Determine MIME type
-    if filename.endswith(".js"):
-        media_type = "application/javascript"
-    elif filename.endswith(".css"):
-        media_type = "text/css"
-    elif filename.endswith(".json"):
-        media_type = "application/json"
-    else:
-        media_type = "application/octet-stream"
-
-    return FileResponse(file_path, media_type=media_type)
+# Starlette handles MIME types, ETag/Last-Modified and 304s for the bundle
+app.mount("/assets", _AssetFiles(directory=ASSETS_DIR, check_dir=False), name="assets")
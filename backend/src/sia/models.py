@@ -1,12 +1,54 @@
 """Sia data models."""
 
-from datetime import datetime
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 from enum import Enum
-from typing import Optional, Any
-from pydantic import BaseModel, Field
+from typing import Optional, Any, Sequence
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+import itertools
+import os
+import time
 import uuid
 
 
+# Durations are whole milliseconds; floor-dividing timedeltas stays in integers
+_ONE_MS = timedelta(milliseconds=1)
+
+# Plan responses embed only the newest logs per step; the full history is
+# paged from /api/agents/{id}/steps/{index}/logs
+STEP_LOGS_INLINE = 50
+
+
+_now_cache: tuple[float, datetime] = (float("-inf"), datetime.min)
+
+
+def elapsed_ms(start: datetime, end: Optional[datetime]) -> Optional[int]:
+    """Whole milliseconds from start to end, or None until there is an end."""
+    if end is None:
+        return None
+    return (end - start) // _ONE_MS
+
+
+def utc_now() -> datetime:
+    """Naive UTC now, reused for calls within the same millisecond."""
+    global _now_cache
+    tick = time.monotonic()
+    if tick - _now_cache[0] >= 0.001:
+        _now_cache = (tick, datetime.now(timezone.utc).replace(tzinfo=None))
+    return _now_cache[1]
+
+
+# IDs are a per-process random prefix plus a counter: unique within the
+# process without a syscall per ID, and unlikely to repeat across restarts
+_ID_PREFIX = os.urandom(2).hex()
+_id_counter = itertools.count()
+
+
+def _gen_id() -> str:
+    """Short ID (8+ hex chars) for models."""
+    return f"{_ID_PREFIX}{next(_id_counter):04x}"
+
+
 class AgentState(str, Enum):
     PENDING = "pending"
     RUNNING = "running"
@@ -53,20 +95,20 @@ class SpanStatus(str, Enum):
     BLOCKED = "blocked"   # Waiting on resource or another agent
 
 
-class Span(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class Span:
     """A span in the distributed trace - represents a unit of work."""
 
-    id: str = Field(default_factory=lambda: str(uuid.uuid4())[:8])
+    id: str = field(default_factory=_gen_id)
     trace_id: str  # Groups all spans in a run
     parent_id: Optional[str] = None  # Parent span ID (null for root)
     kind: SpanKind
     name: str  # Human-readable name
     status: SpanStatus = SpanStatus.RUNNING
 
-    # Timing
-    start_time: datetime = Field(default_factory=datetime.utcnow)
+    # Timing (duration_ms is derived from these)
+    start_time: datetime = field(default_factory=utc_now)
     end_time: Optional[datetime] = None
-    duration_ms: Optional[int] = None
 
     # Context
     agent_id: Optional[str] = None  # Which agent owns this span
@@ -78,30 +120,35 @@ class Span(BaseModel):
     blocked_duration_ms: Optional[int] = None
 
     # Artifacts and data
-    attributes: dict[str, Any] = Field(default_factory=dict)  # Arbitrary metadata
+    attributes: dict[str, Any] = field(default_factory=dict)  # Arbitrary metadata
     error_message: Optional[str] = None
 
     # For workspace spans
     file_path: Optional[str] = None
     operation: Optional[str] = None  # read, write, execute
 
+    @property
+    def duration_ms(self) -> Optional[int]:
+        """Milliseconds from start to end, once ended."""
+        return elapsed_ms(self.start_time, self.end_time)
 
-class Run(BaseModel):
+
+@dataclass(slots=True, kw_only=True)
+class Run:
     """A complete execution run - the root trace."""
 
-    id: str = Field(default_factory=lambda: str(uuid.uuid4())[:8])
-    trace_id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    id: str = field(default_factory=_gen_id)
+    trace_id: str = field(default_factory=lambda: str(uuid.uuid4()))
     name: str  # User-provided task/description
     status: SpanStatus = SpanStatus.RUNNING
 
-    # Timing
-    start_time: datetime = Field(default_factory=datetime.utcnow)
+    # Timing (duration_ms is derived from these)
+    start_time: datetime = field(default_factory=utc_now)
     end_time: Optional[datetime] = None
-    duration_ms: Optional[int] = None
 
     # Agents in this run
     root_agent_id: Optional[str] = None
-    agent_ids: list[str] = Field(default_factory=list)
+    agent_ids: list[str] = field(default_factory=list)
 
     # Computed metrics
     total_spans: int = 0
@@ -109,78 +156,114 @@ class Run(BaseModel):
     failed_spans: int = 0
     blocked_spans: int = 0
     max_concurrency: int = 0
-    files_touched: list[str] = Field(default_factory=list)
+    files_touched: Sequence[str] = ()
 
     # For plan divergence tracking
-    planned_steps: list[str] = Field(default_factory=list)  # Original plan
-    executed_steps: list[str] = Field(default_factory=list)  # What actually ran
+    planned_steps: Sequence[str] = ()  # Original plan
+    executed_steps: Sequence[str] = ()  # What actually ran
 
+    # Running tallies the registry keeps as spans start and end
+    _open_spans: int = field(default=0, init=False, repr=False)
+    _file_paths: set[str] = field(default_factory=set, init=False, repr=False)
 
-class StepLog(BaseModel):
+    @property
+    def duration_ms(self) -> Optional[int]:
+        """Milliseconds from start to end, once ended."""
+        return elapsed_ms(self.start_time, self.end_time)
+
+
+@dataclass(slots=True, kw_only=True)
+class StepLog:
     """A log entry for a plan step."""
 
-    id: str = Field(default_factory=lambda: str(uuid.uuid4())[:8])
+    id: str = field(default_factory=_gen_id)
     message: str
     level: str = "info"  # info, warning, error, debug
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = field(default_factory=utc_now)
 
 
-class PlanStep(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class PlanStep:
     """A step in an agent's plan."""
 
-    id: str = Field(default_factory=lambda: str(uuid.uuid4())[:8])
+    id: str = field(default_factory=_gen_id)
     index: int  # Step number (1-based)
     description: str
     status: StepStatus = StepStatus.PENDING
-    files: list[str] = Field(default_factory=list)  # Files involved in this step
-    logs: list[StepLog] = Field(default_factory=list)
+    # Sequence fields default to a shared empty tuple and are replaced, never
+    # mutated in place; logs becomes a list on the first add_step_log
+    files: Sequence[str] = ()  # Files involved in this step
+    logs: Sequence[StepLog] = ()
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     # Extended fields for detailed plan view
     owner: Optional[str] = None  # Agent or subagent that owns this step
-    resources: list[str] = Field(default_factory=list)  # Required resources (files, processes)
-    artifacts: list[str] = Field(default_factory=list)  # Expected outputs
+    resources: Sequence[str] = ()  # Required resources (files, processes)
+    artifacts: Sequence[str] = ()  # Expected outputs
     reason: Optional[str] = None  # Why this step was chosen
     confidence: Optional[StepConfidence] = None  # Confidence level
-    blocked_by: list[int] = Field(default_factory=list)  # Step indices this is blocked by
+    blocked_by: Sequence[int] = ()  # Step indices this is blocked by
     can_parallel: bool = False  # Can run in parallel with other steps
 
+    @property
+    def recent_logs(self) -> Sequence[StepLog]:
+        """The newest logs, as embedded in plan responses."""
+        return self.logs[-STEP_LOGS_INLINE:]
+
+    @property
+    def logs_count(self) -> int:
+        """Total number of logs on this step."""
+        return len(self.logs)
+
 
-class Plan(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class Plan:
     """An agent's execution plan."""
 
-    steps: list[PlanStep] = Field(default_factory=list)
+    steps: list[PlanStep] = field(default_factory=list)
     current_step_index: Optional[int] = None  # 1-based index of current step
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = field(default_factory=utc_now)
+    steps_by_index: dict[int, PlanStep] = field(init=False, repr=False)
+    # Sorted indices of PENDING steps, kept in step by the registry
+    pending_indices: list[int] = field(init=False, repr=False)
 
+    def __post_init__(self) -> None:
+        self.steps_by_index = {s.index: s for s in self.steps}
+        self.pending_indices = sorted(
+            s.index for s in self.steps if s.status == StepStatus.PENDING
+        )
 
-class WorkUnit(BaseModel):
+
+@dataclass(slots=True, kw_only=True)
+class WorkUnit:
     """A resource (file/directory) being worked on by an agent."""
 
-    id: str = Field(default_factory=lambda: str(uuid.uuid4())[:8])
+    id: str = field(default_factory=_gen_id)
     path: str  # File or directory path
     agent_id: str  # Agent working on this resource
     step_index: Optional[int] = None  # Which step this is associated with
     operation: str = "unknown"  # read, write, execute, etc.
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    created_at: datetime = field(default_factory=utc_now)
 
 
-class ToolCall(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class ToolCall:
     """Represents a single tool execution."""
 
-    id: str = Field(default_factory=lambda: str(uuid.uuid4())[:8])
+    id: str = field(default_factory=_gen_id)
     tool_name: str
     tool_input: dict[str, Any]
     tool_output: str
     duration_ms: int
     step_index: Optional[int] = None  # Which step this tool call is part of
-    timestamp: datetime = Field(default_factory=datetime.utcnow)
+    timestamp: datetime = field(default_factory=utc_now)
 
 
-class Agent(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class Agent:
     """Represents an agent instance."""
 
-    id: str = Field(default_factory=lambda: str(uuid.uuid4())[:8])
+    id: str = field(default_factory=_gen_id)
     task: str
     name: Optional[str] = None
     model: Optional[str] = None
@@ -189,18 +272,34 @@ class Agent(BaseModel):
     response: Optional[str] = None
     error: Optional[str] = None
     plan: Optional[Plan] = None
-    tool_calls: list[ToolCall] = Field(default_factory=list)
-    created_at: datetime = Field(default_factory=datetime.utcnow)
+    tool_calls: list[ToolCall] = field(default_factory=list)
+    created_at: datetime = field(default_factory=utc_now)
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     # Session tracking
     session_id: Optional[str] = None
     working_directory: Optional[str] = None
-    last_activity: datetime = Field(default_factory=datetime.utcnow)
+    last_activity: datetime = field(default_factory=utc_now)
     # Tracing
     trace_id: Optional[str] = None  # Which run this agent belongs to
     span_id: Optional[str] = None  # This agent's span in the trace
     parent_agent_id: Optional[str] = None  # Parent agent (for subagents)
+    # Monotonic clock of last_activity, used for stale-session expiry
+    _active_at: float = field(default_factory=time.monotonic, init=False, repr=False)
+    # The run this agent's trace belongs to, set once at registration
+    _run: Optional[Run] = field(default=None, init=False, repr=False)
+    # Tool calls ever reported; tool_calls itself only keeps the newest
+    _tool_call_count: int = field(default=0, init=False, repr=False)
+
+    @property
+    def active_at(self) -> float:
+        """Monotonic time of the agent's last activity."""
+        return self._active_at
+
+    @property
+    def tool_call_count(self) -> int:
+        """Number of tool calls reported, including ones trimmed from history."""
+        return self._tool_call_count
 
 
 # API Request/Response models
@@ -227,6 +326,8 @@ class ReportToolCallRequest(BaseModel):
 
 
 class ToolCallResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     tool_name: str
     tool_input: dict[str, Any]
@@ -270,6 +371,8 @@ class AddStepLogRequest(BaseModel):
 # Response models
 
 class StepLogResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     message: str
     level: str
@@ -277,12 +380,15 @@ class StepLogResponse(BaseModel):
 
 
 class PlanStepResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     index: int
     description: str
     status: StepStatus
     files: list[str]
-    logs: list[StepLogResponse]
+    logs: list[StepLogResponse] = Field(validation_alias="recent_logs")  # Newest only
+    logs_count: int = 0
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     # Extended fields
@@ -296,12 +402,16 @@ class PlanStepResponse(BaseModel):
 
 
 class PlanResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     steps: list[PlanStepResponse]
     current_step_index: Optional[int] = None
     created_at: datetime
 
 
 class WorkUnitResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     path: str
     agent_id: str
@@ -311,6 +421,8 @@ class WorkUnitResponse(BaseModel):
 
 
 class AgentResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
     id: str
     task: str
     name: Optional[str] = None
@@ -354,8 +466,6 @@ class SpanResponse(BaseModel):
     error_message: Optional[str] = None
     file_path: Optional[str] = None
     operation: Optional[str] = None
-    # Nested children for tree view
-    children: list["SpanResponse"] = []
 
 
 class RunResponse(BaseModel):
@@ -373,16 +483,16 @@ class RunResponse(BaseModel):
     failed_spans: int = 0
     blocked_spans: int = 0
     max_concurrency: int = 0
-    files_touched: list[str] = []
-    planned_steps: list[str] = []
-    executed_steps: list[str] = []
+    files_touched: Sequence[str] = ()
+    planned_steps: Sequence[str] = ()
+    executed_steps: Sequence[str] = ()
 
 
 class RunWithSpansResponse(BaseModel):
     """A run with all its spans for the trace waterfall view."""
     run: RunResponse
     spans: list[SpanResponse]  # Flat list of all spans
-    root_span: Optional[SpanResponse] = None  # Tree structure
+    children: dict[str, list[str]] = {}  # parent span ID -> child span IDs
 
 
 class TimelineEvent(BaseModel):
@@ -531,3 +641,14 @@ class WorkspaceMapResponse(BaseModel):
     edges: list[WorkspaceEdge] = []
     conflicts: list[WorkspaceConflict] = []
     metrics: WorkspaceMapMetrics = WorkspaceMapMetrics()
+
+
+# Pre-built validators/serializers for the polled and span-heavy responses
+AGENT_LIST_ADAPTER = TypeAdapter(list[AgentResponse])
+STEP_LOG_LIST_ADAPTER = TypeAdapter(list[StepLogResponse])
+WORK_UNIT_LIST_ADAPTER = TypeAdapter(list[WorkUnitResponse])
+RUN_LIST_ADAPTER = TypeAdapter(list[RunResponse])
+RUN_WITH_SPANS_ADAPTER = TypeAdapter(RunWithSpansResponse)
+TIMELINE_ADAPTER = TypeAdapter(TimelineResponse)
+AGENT_GRAPH_ADAPTER = TypeAdapter(AgentGraphResponse)
+WORKSPACE_MAP_ADAPTER = TypeAdapter(WorkspaceMapResponse)
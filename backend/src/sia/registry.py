@@ -1,25 +1,118 @@
 """Agent registry - in-memory store for agent instances."""
 
-from datetime import datetime
 from typing import Optional, Union
+import bisect
+import functools
+import itertools
+import sys
+import threading
+import time
 import uuid
 from .models import (
     Agent, AgentState, AgentSource, ToolCall,
     Plan, PlanStep, StepLog, StepStatus, StepConfidence, WorkUnit,
-    PlanStepInput, Run, Span, SpanKind, SpanStatus
+    PlanStepInput, Run, Span, SpanKind, SpanStatus, utc_now,
 )
 
 
+# Enum lookups by value: a dict miss replaces EnumMeta.__call__ and ValueError
+_SOURCE_BY_VALUE = {e.value: e for e in AgentSource}
+_STATE_BY_VALUE = {e.value: e for e in AgentState}
+_STATUS_BY_VALUE = {e.value: e for e in StepStatus}
+_CONFIDENCE_BY_VALUE = {e.value: e for e in StepConfidence}
+
+# Per-agent history caps; the oldest entries are dropped past these
+MAX_TOOL_CALLS = 500
+MAX_STEP_LOGS = 1000
+
+
+def _step_from_str(index: int, description: str) -> PlanStep:
+    """Plan step from a plain description."""
+    return PlanStep(index=index, description=description)
+
+
+def _step_from_dict(index: int, data: dict) -> PlanStep:
+    """Plan step from a dict with extended fields."""
+    return PlanStep(
+        index=index,
+        description=data.get('description', ''),
+        owner=data.get('owner'),
+        resources=data.get('resources', ()),
+        artifacts=data.get('artifacts', ()),
+        reason=data.get('reason'),
+        confidence=_CONFIDENCE_BY_VALUE.get(data.get('confidence')),
+        blocked_by=data.get('blocked_by', ()),
+        can_parallel=data.get('can_parallel', False),
+    )
+
+
+def _step_from_input(index: int, data: PlanStepInput) -> PlanStep:
+    """Plan step from a validated PlanStepInput."""
+    return PlanStep(
+        index=index,
+        description=data.description,
+        owner=data.owner,
+        resources=data.resources,
+        artifacts=data.artifacts,
+        reason=data.reason,
+        confidence=_CONFIDENCE_BY_VALUE.get(data.confidence),
+        blocked_by=data.blocked_by,
+        can_parallel=data.can_parallel,
+    )
+
+
+# set_plan dispatches on the exact step type with one dict lookup
+_STEP_BUILDERS = {
+    str: _step_from_str,
+    dict: _step_from_dict,
+    PlanStepInput: _step_from_input,
+}
+
+
+def _locked(method):
+    """Run a registry method while holding the registry lock.
+
+    Sync routes read the registry from the threadpool while hook and agent
+    routes mutate it on the event loop, so writers and the readers that walk
+    internal dicts take the lock; single-key gets stay lock-free.
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
 class AgentRegistry:
     """In-memory registry for tracking agents, runs, and spans."""
 
+    __slots__ = (
+        "_agents", "_agents_snapshot", "_session_index", "_work_units", "_agent_paths",
+        "_work_unit_seq", "_runs", "_runs_by_trace", "_spans", "_spans_by_trace", "_version", "_lock",
+    )
+
     def __init__(self):
         self._agents: dict[str, Agent] = {}
+        self._agents_snapshot: Optional[tuple[Agent, ...]] = None  # newest first
+        self._session_index: dict[str, str] = {}  # session_id -> agent_id
         self._work_units: dict[str, WorkUnit] = {}  # path -> WorkUnit
+        # agent_id -> {path: position of the path in _work_units}, so an
+        # agent's work units list in the same order as list_work_units
+        self._agent_paths: dict[str, dict[str, int]] = {}
+        self._work_unit_seq = itertools.count()
         self._runs: dict[str, Run] = {}  # run_id -> Run
+        self._runs_by_trace: dict[str, Run] = {}  # trace_id -> Run
         self._spans: dict[str, Span] = {}  # span_id -> Span
-        self._spans_by_trace: dict[str, list[str]] = {}  # trace_id -> [span_ids]
+        self._spans_by_trace: dict[str, list[Span]] = {}  # trace_id -> spans, in start order
+        self._version = 0  # bumped on every change that shows up in run graphs
+        self._lock = threading.RLock()  # see _locked
 
+    @property
+    def version(self) -> int:
+        """Counter that changes whenever agents, work units, runs or spans do."""
+        return self._version
+
+    @_locked
     def register(
         self,
         task: str,
@@ -30,25 +123,22 @@ class AgentRegistry:
         working_directory: Optional[str] = None,
         parent_agent_id: Optional[str] = None,
         trace_id: Optional[str] = None,
+        state: Optional[str] = None,
     ) -> Agent:
-        """Register a new agent."""
-        # Parse source
-        agent_source = AgentSource.UNKNOWN
-        if source:
-            try:
-                agent_source = AgentSource(source)
-            except ValueError:
-                pass
+        """Register a new agent, optionally in an initial state."""
+        self._version += 1
+        agent_source = _SOURCE_BY_VALUE.get(source, AgentSource.UNKNOWN)
+        agent_state = _STATE_BY_VALUE.get(state, AgentState.PENDING)
+
+        parent = self._agents.get(parent_agent_id) if parent_agent_id else None
 
         # If this is a root agent (no parent), create a new run
         if not parent_agent_id:
             run = self._create_run(task)
             trace_id = run.trace_id
-        elif trace_id is None and parent_agent_id:
+        elif trace_id is None and parent:
             # Inherit trace_id from parent
-            parent = self._agents.get(parent_agent_id)
-            if parent:
-                trace_id = parent.trace_id
+            trace_id = parent.trace_id
 
         agent = Agent(
             task=task,
@@ -59,15 +149,16 @@ class AgentRegistry:
             working_directory=working_directory,
             trace_id=trace_id,
             parent_agent_id=parent_agent_id,
+            state=agent_state,
         )
+        # The ID keys every agent, session, work-unit and span lookup
+        agent.id = sys.intern(agent.id)
+        if agent_state == AgentState.RUNNING:
+            agent.started_at = agent.created_at
 
         # Create span for this agent
         if trace_id:
-            parent_span_id = None
-            if parent_agent_id:
-                parent = self._agents.get(parent_agent_id)
-                if parent:
-                    parent_span_id = parent.span_id
+            parent_span_id = parent.span_id if parent else None
             span = self._create_span(
                 trace_id=trace_id,
                 kind=SpanKind.AGENT,
@@ -78,35 +169,46 @@ class AgentRegistry:
             agent.span_id = span.id
 
             # Update run with agent info
-            run = self._runs.get(self._get_run_id_by_trace(trace_id))
+            run = self._runs_by_trace.get(trace_id)
             if run:
+                agent._run = run
                 run.agent_ids.append(agent.id)
                 if not parent_agent_id:
                     run.root_agent_id = agent.id
 
         self._agents[agent.id] = agent
+        self._agents_snapshot = None
+        if session_id is not None:
+            self._session_index[session_id] = agent.id
         return agent
 
     def get(self, agent_id: str) -> Optional[Agent]:
         """Get an agent by ID."""
         return self._agents.get(agent_id)
 
+    @_locked
     def remove(self, agent_id: str) -> bool:
         """Remove an agent by ID."""
-        if agent_id in self._agents:
-            # Also clean up work units
-            self.clear_agent_work_units(agent_id)
-            del self._agents[agent_id]
-            return True
-        return False
-
+        self._version += 1
+        agent = self._agents.pop(agent_id, None)
+        if agent is None:
+            return False
+        self._agents_snapshot = None
+        if self._session_index.get(agent.session_id) == agent_id:
+            del self._session_index[agent.session_id]
+        # Also clean up work units
+        self.clear_agent_work_units(agent_id)
+        return True
+
+    def get_by_session(self, session_id: str) -> Optional[Agent]:
+        """Get the agent registered for a hook session."""
+        agent_id = self._session_index.get(session_id)
+        return self._agents.get(agent_id) if agent_id is not None else None
+
+    @_locked
     def remove_by_session(self, session_id: str) -> bool:
         """Remove an agent by session ID."""
-        agent_id = None
-        for aid, agent in self._agents.items():
-            if agent.session_id == session_id:
-                agent_id = aid
-                break
+        agent_id = self._session_index.get(session_id)
         if agent_id:
             return self.remove(agent_id)
         return False
@@ -115,16 +217,19 @@ class AgentRegistry:
         """Update last_activity timestamp for an agent."""
         agent = self._agents.get(agent_id)
         if agent:
-            agent.last_activity = datetime.utcnow()
+            agent.last_activity = utc_now()
+            agent._active_at = time.monotonic()
 
-    def list_all(self) -> list[Agent]:
+    @_locked
+    def list_all(self) -> tuple[Agent, ...]:
         """List all agents, newest first."""
-        return sorted(
-            self._agents.values(),
-            key=lambda a: a.created_at,
-            reverse=True,
-        )
+        # Rebuilt only after an agent is added or removed. register is the
+        # only writer, so insertion order is already created_at order.
+        if self._agents_snapshot is None:
+            self._agents_snapshot = tuple(reversed(self._agents.values()))
+        return self._agents_snapshot
 
+    @_locked
     def update_state(
         self,
         agent_id: str,
@@ -133,19 +238,20 @@ class AgentRegistry:
         error: Optional[str] = None,
     ) -> Optional[Agent]:
         """Update an agent's state."""
+        self._version += 1
         agent = self._agents.get(agent_id)
         if not agent:
             return None
 
-        try:
-            agent.state = AgentState(state)
-        except ValueError:
+        new_state = _STATE_BY_VALUE.get(state)
+        if new_state is None:
             return None
+        agent.state = new_state
 
         if agent.state == AgentState.RUNNING:
-            agent.started_at = datetime.utcnow()
+            agent.started_at = utc_now()
         elif agent.state in (AgentState.COMPLETED, AgentState.FAILED):
-            agent.completed_at = datetime.utcnow()
+            agent.completed_at = utc_now()
 
         if response is not None:
             agent.response = response
@@ -154,6 +260,7 @@ class AgentRegistry:
 
         return agent
 
+    @_locked
     def add_tool_call(
         self,
         agent_id: str,
@@ -164,6 +271,7 @@ class AgentRegistry:
         step_index: Optional[int] = None,
     ) -> Optional[ToolCall]:
         """Record a tool call for an agent."""
+        self._version += 1
         agent = self._agents.get(agent_id)
         if not agent:
             return None
@@ -172,18 +280,25 @@ class AgentRegistry:
         if step_index is None and agent.plan and agent.plan.current_step_index:
             step_index = agent.plan.current_step_index
 
+        # Names, levels, operations and paths repeat across many records, so
+        # they are interned as they enter the registry
         tool_call = ToolCall(
-            tool_name=tool_name,
+            tool_name=sys.intern(tool_name),
             tool_input=tool_input,
             tool_output=tool_output,
             duration_ms=duration_ms,
             step_index=step_index,
         )
-        agent.tool_calls.append(tool_call)
+        tool_calls = agent.tool_calls
+        tool_calls.append(tool_call)
+        agent._tool_call_count += 1
+        if len(tool_calls) > MAX_TOOL_CALLS:
+            del tool_calls[:len(tool_calls) - MAX_TOOL_CALLS]
         return tool_call
 
     # Plan management methods
 
+    @_locked
     def set_plan(
         self,
         agent_id: str,
@@ -195,52 +310,22 @@ class AgentRegistry:
             return None
 
         plan_steps = []
-        for i, step_data in enumerate(steps):
-            if isinstance(step_data, str):
-                # Simple string description
-                plan_steps.append(PlanStep(index=i + 1, description=step_data))
-            elif isinstance(step_data, dict):
-                # Dictionary with extended fields
-                confidence = None
-                if step_data.get('confidence'):
-                    try:
-                        confidence = StepConfidence(step_data['confidence'])
-                    except ValueError:
-                        pass
-                plan_steps.append(PlanStep(
-                    index=i + 1,
-                    description=step_data.get('description', ''),
-                    owner=step_data.get('owner'),
-                    resources=step_data.get('resources', []),
-                    artifacts=step_data.get('artifacts', []),
-                    reason=step_data.get('reason'),
-                    confidence=confidence,
-                    blocked_by=step_data.get('blocked_by', []),
-                    can_parallel=step_data.get('can_parallel', False),
-                ))
-            elif isinstance(step_data, PlanStepInput):
-                # PlanStepInput object
-                confidence = None
-                if step_data.confidence:
-                    try:
-                        confidence = StepConfidence(step_data.confidence)
-                    except ValueError:
-                        pass
-                plan_steps.append(PlanStep(
-                    index=i + 1,
-                    description=step_data.description,
-                    owner=step_data.owner,
-                    resources=step_data.resources,
-                    artifacts=step_data.artifacts,
-                    reason=step_data.reason,
-                    confidence=confidence,
-                    blocked_by=step_data.blocked_by,
-                    can_parallel=step_data.can_parallel,
-                ))
+        for i, step_data in enumerate(steps, start=1):
+            build = _STEP_BUILDERS.get(type(step_data))
+            if build is None:
+                # Subclasses of the accepted types
+                build = next(
+                    (b for t, b in _STEP_BUILDERS.items() if isinstance(step_data, t)),
+                    None,
+                )
+                if build is None:
+                    continue
+            plan_steps.append(build(i, step_data))
 
         agent.plan = Plan(steps=plan_steps)
         return agent.plan
 
+    @_locked
     def update_step(
         self,
         agent_id: str,
@@ -253,39 +338,15 @@ class AgentRegistry:
         if not agent or not agent.plan:
             return None
 
-        # Find the step
-        step = None
-        for s in agent.plan.steps:
-            if s.index == step_index:
-                step = s
-                break
-
+        step = agent.plan.steps_by_index.get(step_index)
         if not step:
             return None
 
-        # Update status
-        try:
-            new_status = StepStatus(status)
-        except ValueError:
+        new_status = _STATUS_BY_VALUE.get(status)
+        if new_status is None:
             return None
 
-        step.status = new_status
-
-        # Track timing
-        if new_status == StepStatus.IN_PROGRESS:
-            step.started_at = datetime.utcnow()
-            agent.plan.current_step_index = step_index
-        elif new_status in (StepStatus.COMPLETED, StepStatus.SKIPPED):
-            step.completed_at = datetime.utcnow()
-            # Auto-advance current_step_index if this was the current step
-            if agent.plan.current_step_index == step_index:
-                # Find next pending step
-                next_step = None
-                for s in agent.plan.steps:
-                    if s.index > step_index and s.status == StepStatus.PENDING:
-                        next_step = s
-                        break
-                agent.plan.current_step_index = next_step.index if next_step else None
+        self._apply_step_status(agent.plan, step, new_status)
 
         # Update files and track work units
         if files is not None:
@@ -296,6 +357,62 @@ class AgentRegistry:
 
         return step
 
+    @_locked
+    def update_steps_bulk(
+        self,
+        agent_id: str,
+        changes: list[tuple[int, str]],
+    ) -> int:
+        """Apply several (step_index, status) updates in order. Returns the number applied."""
+        agent = self._agents.get(agent_id)
+        if not agent or not agent.plan:
+            return 0
+
+        steps_by_index = agent.plan.steps_by_index
+        applied = 0
+        for step_index, status in changes:
+            step = steps_by_index.get(step_index)
+            if not step:
+                continue
+            new_status = _STATUS_BY_VALUE.get(status)
+            if new_status is None:
+                continue
+            self._apply_step_status(agent.plan, step, new_status)
+            applied += 1
+        return applied
+
+    def _apply_step_status(self, plan: Plan, step: PlanStep, new_status: StepStatus) -> None:
+        """Set a step's status, tracking timing and the plan's current step."""
+        pending = plan.pending_indices
+        if step.status == StepStatus.PENDING and new_status != StepStatus.PENDING:
+            i = bisect.bisect_left(pending, step.index)
+            if i < len(pending) and pending[i] == step.index:
+                del pending[i]
+        elif step.status != StepStatus.PENDING and new_status == StepStatus.PENDING:
+            bisect.insort(pending, step.index)
+        step.status = new_status
+
+        # Track timing
+        if new_status == StepStatus.IN_PROGRESS:
+            step.started_at = utc_now()
+            plan.current_step_index = step.index
+        elif new_status in (StepStatus.COMPLETED, StepStatus.SKIPPED):
+            step.completed_at = utc_now()
+            # Auto-advance current_step_index if this was the current step
+            if plan.current_step_index == step.index:
+                # Next pending step after this one
+                i = bisect.bisect_right(pending, step.index)
+                plan.current_step_index = pending[i] if i < len(pending) else None
+
+    def get_step(self, agent_id: str, step_index: int) -> Optional[PlanStep]:
+        """Get a step of an agent's plan by its 1-based index."""
+        agent = self._agents.get(agent_id)
+        if not agent or not agent.plan:
+            return None
+
+        return agent.plan.steps_by_index.get(step_index)
+
+    @_locked
     def add_step_log(
         self,
         agent_id: str,
@@ -304,22 +421,17 @@ class AgentRegistry:
         level: str = "info",
     ) -> Optional[StepLog]:
         """Add a log entry to a step."""
-        agent = self._agents.get(agent_id)
-        if not agent or not agent.plan:
-            return None
-
-        # Find the step
-        step = None
-        for s in agent.plan.steps:
-            if s.index == step_index:
-                step = s
-                break
-
+        step = self.get_step(agent_id, step_index)
         if not step:
             return None
 
-        log = StepLog(message=message, level=level)
-        step.logs.append(log)
+        log = StepLog(message=message, level=sys.intern(level))
+        if step.logs:
+            step.logs.append(log)
+            if len(step.logs) > MAX_STEP_LOGS:
+                del step.logs[:len(step.logs) - MAX_STEP_LOGS]
+        else:
+            step.logs = [log]
         return log
 
     # Work unit management
@@ -333,17 +445,36 @@ class AgentRegistry:
     ) -> WorkUnit:
         """Internal: Add or update a work unit."""
         # Normalize path
-        normalized_path = path.replace("\\", "/")
-
+        normalized_path = sys.intern(path.replace("\\", "/"))
+
+        # Re-touching a file the same way (e.g. repeated reads) keeps the
+        # existing work unit
+        previous = self._work_units.get(normalized_path)
+        if (
+            previous is not None
+            and previous.agent_id == agent_id
+            and previous.step_index == step_index
+            and previous.operation == operation
+        ):
+            return previous
+
+        self._version += 1
         work_unit = WorkUnit(
             path=normalized_path,
             agent_id=agent_id,
             step_index=step_index,
-            operation=operation,
+            operation=sys.intern(operation),
         )
+        if previous is None:
+            seq = next(self._work_unit_seq)
+        else:
+            # Replacing a dict value keeps its position in _work_units
+            seq = self._agent_paths[previous.agent_id].pop(normalized_path)
         self._work_units[normalized_path] = work_unit
+        self._agent_paths.setdefault(agent_id, {})[normalized_path] = seq
         return work_unit
 
+    @_locked
     def track_file_access(
         self,
         agent_id: str,
@@ -357,28 +488,38 @@ class AgentRegistry:
             step_index = agent.plan.current_step_index
         return self._add_work_unit(agent_id, path, step_index, operation)
 
+    @_locked
     def remove_work_unit(self, path: str) -> bool:
         """Remove a work unit by path."""
+        self._version += 1
         normalized_path = path.replace("\\", "/")
-        if normalized_path in self._work_units:
-            del self._work_units[normalized_path]
-            return True
-        return False
+        work_unit = self._work_units.pop(normalized_path, None)
+        if work_unit is None:
+            return False
+        self._agent_paths[work_unit.agent_id].pop(normalized_path, None)
+        return True
 
+    @_locked
     def list_work_units(self) -> list[WorkUnit]:
         """List all active work units."""
         return list(self._work_units.values())
 
+    @_locked
     def get_agent_work_units(self, agent_id: str) -> list[WorkUnit]:
         """Get work units for a specific agent."""
-        return [wu for wu in self._work_units.values() if wu.agent_id == agent_id]
+        paths = self._agent_paths.get(agent_id)
+        if not paths:
+            return []
+        return [self._work_units[path] for path in sorted(paths, key=paths.__getitem__)]
 
+    @_locked
     def clear_agent_work_units(self, agent_id: str) -> int:
         """Clear all work units for an agent. Returns count removed."""
-        to_remove = [path for path, wu in self._work_units.items() if wu.agent_id == agent_id]
-        for path in to_remove:
+        self._version += 1
+        paths = self._agent_paths.pop(agent_id, {})
+        for path in paths:
             del self._work_units[path]
-        return len(to_remove)
+        return len(paths)
 
     # =====================================
     # Run & Span Management (Tracing)
@@ -388,16 +529,10 @@ class AgentRegistry:
         """Create a new run (root trace)."""
         run = Run(name=name)
         self._runs[run.id] = run
+        self._runs_by_trace[run.trace_id] = run
         self._spans_by_trace[run.trace_id] = []
         return run
 
-    def _get_run_id_by_trace(self, trace_id: str) -> Optional[str]:
-        """Get run ID by trace ID."""
-        for run_id, run in self._runs.items():
-            if run.trace_id == trace_id:
-                return run_id
-        return None
-
     def _create_span(
         self,
         trace_id: str,
@@ -411,6 +546,7 @@ class AgentRegistry:
         attributes: Optional[dict] = None,
     ) -> Span:
         """Create a new span in a trace."""
+        self._version += 1
         span = Span(
             trace_id=trace_id,
             parent_id=parent_id,
@@ -423,17 +559,23 @@ class AgentRegistry:
             attributes=attributes or {},
         )
         self._spans[span.id] = span
-        if trace_id in self._spans_by_trace:
-            self._spans_by_trace[trace_id].append(span.id)
+        trace_spans = self._spans_by_trace.get(trace_id)
+        if trace_spans is not None:
+            trace_spans.append(span)
 
         # Update run stats
-        run_id = self._get_run_id_by_trace(trace_id)
-        if run_id:
-            run = self._runs[run_id]
+        run = self._runs_by_trace.get(trace_id)
+        if run:
             run.total_spans += 1
+            run._open_spans += 1
+            if run._open_spans > run.max_concurrency:
+                run.max_concurrency = run._open_spans
+            if file_path:
+                run._file_paths.add(file_path)
 
         return span
 
+    @_locked
     def end_span(
         self,
         span_id: str,
@@ -441,20 +583,22 @@ class AgentRegistry:
         error_message: Optional[str] = None,
     ) -> Optional[Span]:
         """End a span with the given status."""
+        self._version += 1
         span = self._spans.get(span_id)
         if not span:
             return None
 
-        span.end_time = datetime.utcnow()
+        was_open = span.end_time is None
+        span.end_time = utc_now()
         span.status = status
-        span.duration_ms = int((span.end_time - span.start_time).total_seconds() * 1000)
         if error_message:
             span.error_message = error_message
 
         # Update run stats
-        run_id = self._get_run_id_by_trace(span.trace_id)
-        if run_id:
-            run = self._runs[run_id]
+        run = self._runs_by_trace.get(span.trace_id)
+        if run:
+            if was_open:
+                run._open_spans -= 1
             if status == SpanStatus.COMPLETED:
                 run.completed_spans += 1
             elif status == SpanStatus.FAILED:
@@ -464,6 +608,7 @@ class AgentRegistry:
 
         return span
 
+    @_locked
     def set_span_blocked(
         self,
         span_id: str,
@@ -471,6 +616,7 @@ class AgentRegistry:
         blocked_by_resource: Optional[str] = None,
     ) -> Optional[Span]:
         """Mark a span as blocked."""
+        self._version += 1
         span = self._spans.get(span_id)
         if not span:
             return None
@@ -486,65 +632,47 @@ class AgentRegistry:
 
     def get_run_by_trace(self, trace_id: str) -> Optional[Run]:
         """Get a run by trace ID."""
-        run_id = self._get_run_id_by_trace(trace_id)
-        if run_id:
-            return self._runs.get(run_id)
-        return None
+        return self._runs_by_trace.get(trace_id)
 
+    @_locked
     def list_runs(self) -> list[Run]:
         """List all runs, newest first."""
-        return sorted(
-            self._runs.values(),
-            key=lambda r: r.start_time,
-            reverse=True,
-        )
+        # Runs are only created by _create_run, stamped with their start_time
+        # as they are inserted, so reversed insertion order is newest first
+        return list(reversed(self._runs.values()))
 
+    @_locked
     def get_spans_for_trace(self, trace_id: str) -> list[Span]:
-        """Get all spans for a trace."""
-        span_ids = self._spans_by_trace.get(trace_id, [])
-        spans = [self._spans[sid] for sid in span_ids if sid in self._spans]
-        return sorted(spans, key=lambda s: s.start_time)
+        """Get all spans for a trace, in start order."""
+        # Spans are appended as they are created, so the list is already
+        # ordered by start_time
+        return list(self._spans_by_trace.get(trace_id, ()))
 
     def get_span(self, span_id: str) -> Optional[Span]:
         """Get a span by ID."""
         return self._spans.get(span_id)
 
+    @_locked
     def end_run(
         self,
         run_id: str,
         status: SpanStatus = SpanStatus.COMPLETED,
     ) -> Optional[Run]:
         """End a run."""
+        self._version += 1
         run = self._runs.get(run_id)
         if not run:
             return None
 
-        run.end_time = datetime.utcnow()
+        run.end_time = utc_now()
         run.status = status
-        run.duration_ms = int((run.end_time - run.start_time).total_seconds() * 1000)
-
-        # Calculate max concurrency and collect files touched
-        spans = self.get_spans_for_trace(run.trace_id)
-        run.files_touched = list(set(
-            s.file_path for s in spans if s.file_path
-        ))
-
-        # Calculate max concurrent spans at any point
-        events = []
-        for s in spans:
-            events.append((s.start_time, 1))
-            if s.end_time:
-                events.append((s.end_time, -1))
-        events.sort(key=lambda x: x[0])
-        current = 0
-        max_conc = 0
-        for _, delta in events:
-            current += delta
-            max_conc = max(max_conc, current)
-        run.max_concurrency = max_conc
+
+        # max_concurrency is tracked as spans open and close
+        run.files_touched = list(run._file_paths)
 
         return run
 
+    @_locked
     def create_tool_span(
         self,
         agent_id: str,
@@ -567,6 +695,7 @@ class AgentRegistry:
             attributes={"tool_input": tool_input},
         )
 
+    @_locked
     def create_workspace_span(
         self,
         agent_id: str,
@@ -586,16 +715,14 @@ class AgentRegistry:
             agent_id=agent_id,
             parent_id=agent.span_id,
             step_index=step_index,
-            file_path=file_path,
-            operation=operation,
+            file_path=sys.intern(file_path),
+            operation=sys.intern(operation),
         )
 
     def get_run_for_agent(self, agent_id: str) -> Optional[Run]:
         """Get the run that an agent belongs to."""
         agent = self._agents.get(agent_id)
-        if not agent or not agent.trace_id:
-            return None
-        return self.get_run_by_trace(agent.trace_id)
+        return agent._run if agent else None
 
 
 # Global registry instance
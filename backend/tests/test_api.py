@@ -0,0 +1,93 @@
+"""Request tests for the control plane API."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from sia.main import app
+from sia.models import STEP_LOGS_INLINE
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+# Hooks
+
+def test_hook_batch_applies_items_in_order(client):
+    payloads = [
+        {"session_id": "batch-session-1", "tool_name": "Read", "tool_input": {"file_path": "a.py"}},
+        {"session_id": "batch-session-1", "tool_name": ""},
+        {"session_id": "batch-session-1", "tool_name": "Edit", "tool_input": {"file_path": "a.py"}},
+        {"session_id": "batch-session-2", "tool_name": "Bash", "tool_input": {"command": "ls"}},
+    ]
+    r = client.post("/api/hooks/tool-use/batch", json=payloads)
+    assert r.status_code == 200
+    body = r.json()
+    assert body["status"] == "ok"
+
+    results = body["results"]
+    assert [res["status"] for res in results] == ["ok", "skipped", "ok", "ok"]
+    assert results[1]["reason"] == "no tool name"
+    agent_id = results[0]["agent_id"]
+    assert results[2]["agent_id"] == agent_id
+    assert results[3]["agent_id"] != agent_id
+
+    agent = client.get(f"/api/agents/{agent_id}").json()
+    assert [tc["tool_name"] for tc in agent["tool_calls"]] == ["Read", "Edit"]
+    # The later Edit wins the work unit
+    work_units = client.get(f"/api/agents/{agent_id}/work-units").json()
+    assert [(wu["path"], wu["operation"]) for wu in work_units] == [("a.py", "write")]
+
+
+def test_hook_batch_rejects_invalid_items(client):
+    r = client.post("/api/hooks/tool-use/batch", json=[{"tool_input": "not a dict"}])
+    assert r.status_code == 422
+
+
+# Step logs
+
+@pytest.fixture
+def agent_with_logs(client):
+    agent_id = client.post("/api/agents/register", json={"task": "t"}).json()["id"]
+    client.post(f"/api/agents/{agent_id}/plan", json={"steps": ["a", "b"]})
+    total = STEP_LOGS_INLINE + 10
+    for i in range(total):
+        client.post(f"/api/agents/{agent_id}/steps/1/logs", json={"message": f"m{i}"})
+    return agent_id, total
+
+
+def test_step_logs_paging(client, agent_with_logs):
+    agent_id, total = agent_with_logs
+
+    r = client.get(f"/api/agents/{agent_id}/steps/1/logs", params={"offset": 5, "limit": 3})
+    assert r.status_code == 200
+    assert [log["message"] for log in r.json()] == ["m5", "m6", "m7"]
+
+    r = client.get(f"/api/agents/{agent_id}/steps/1/logs")
+    assert [log["message"] for log in r.json()] == [f"m{i}" for i in range(total)]
+
+    r = client.get(f"/api/agents/{agent_id}/steps/1/logs", params={"offset": total})
+    assert r.json() == []
+    r = client.get(f"/api/agents/{agent_id}/steps/2/logs")
+    assert r.json() == []
+
+
+def test_step_logs_missing_step(client, agent_with_logs):
+    agent_id, _ = agent_with_logs
+    assert client.get(f"/api/agents/{agent_id}/steps/9/logs").status_code == 404
+    assert client.get("/api/agents/missing/steps/1/logs").status_code == 404
+
+
+def test_plan_responses_inline_only_newest_logs(client, agent_with_logs):
+    agent_id, total = agent_with_logs
+
+    step = client.get(f"/api/agents/{agent_id}").json()["plan"]["steps"][0]
+    assert step["logs_count"] == total
+    assert [log["message"] for log in step["logs"]] == [
+        f"m{i}" for i in range(total - STEP_LOGS_INLINE, total)
+    ]
+
+    other = client.get(f"/api/agents/{agent_id}").json()["plan"]["steps"][1]
+    assert other["logs_count"] == 0
+    assert other["logs"] == []
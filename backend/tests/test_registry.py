@@ -0,0 +1,185 @@
+"""Tests for the in-memory agent registry."""
+
+import pytest
+
+from sia.models import StepStatus
+from sia.registry import AgentRegistry
+
+
+@pytest.fixture
+def registry():
+    return AgentRegistry()
+
+
+def _plan_agent(registry, steps=("a", "b", "c", "d")):
+    agent = registry.register(task="t")
+    registry.set_plan(agent.id, list(steps))
+    return agent
+
+
+def _assert_pending_in_sync(plan):
+    assert plan.pending_indices == [s.index for s in plan.steps if s.status == StepStatus.PENDING]
+
+
+# Plan steps
+
+def test_completing_current_step_advances_to_next_pending(registry):
+    agent = _plan_agent(registry)
+    registry.update_step(agent.id, 1, "in_progress")
+    assert agent.plan.current_step_index == 1
+
+    registry.update_step(agent.id, 1, "completed")
+    assert agent.plan.current_step_index == 2
+    _assert_pending_in_sync(agent.plan)
+
+
+def test_advance_skips_steps_that_are_no_longer_pending(registry):
+    agent = _plan_agent(registry)
+    registry.update_step(agent.id, 1, "in_progress")
+    registry.update_step(agent.id, 2, "completed")
+    registry.update_step(agent.id, 3, "skipped")
+
+    registry.update_step(agent.id, 1, "completed")
+    assert agent.plan.current_step_index == 4
+    _assert_pending_in_sync(agent.plan)
+
+
+def test_skipping_current_step_advances(registry):
+    agent = _plan_agent(registry)
+    registry.update_step(agent.id, 2, "in_progress")
+    registry.update_step(agent.id, 2, "skipped")
+    assert agent.plan.current_step_index == 3
+
+
+def test_advance_only_looks_after_the_finished_step(registry):
+    agent = _plan_agent(registry)
+    registry.update_step(agent.id, 3, "in_progress")
+    registry.update_step(agent.id, 4, "completed")
+
+    # Steps 1 and 2 are still pending but come before step 3
+    registry.update_step(agent.id, 3, "completed")
+    assert agent.plan.current_step_index is None
+    _assert_pending_in_sync(agent.plan)
+
+
+def test_re_pending_step_becomes_next_again(registry):
+    agent = _plan_agent(registry)
+    registry.update_step(agent.id, 4, "skipped")
+    registry.update_step(agent.id, 3, "in_progress")
+    registry.update_step(agent.id, 3, "completed")
+    assert agent.plan.current_step_index is None
+
+    registry.update_step(agent.id, 4, "pending")
+    _assert_pending_in_sync(agent.plan)
+    registry.update_step(agent.id, 3, "in_progress")
+    registry.update_step(agent.id, 3, "completed")
+    assert agent.plan.current_step_index == 4
+    _assert_pending_in_sync(agent.plan)
+
+
+def test_finishing_a_step_that_is_not_current_keeps_current(registry):
+    agent = _plan_agent(registry)
+    registry.update_step(agent.id, 1, "in_progress")
+    registry.update_step(agent.id, 2, "completed")
+    assert agent.plan.current_step_index == 1
+    _assert_pending_in_sync(agent.plan)
+
+
+def test_bulk_updates_keep_pending_in_sync(registry):
+    agent = _plan_agent(registry)
+    registry.update_steps_bulk(agent.id, [(1, "completed"), (2, "in_progress"), (3, "skipped")])
+    assert agent.plan.current_step_index == 2
+    _assert_pending_in_sync(agent.plan)
+
+    registry.update_steps_bulk(agent.id, [(3, "pending"), (2, "completed")])
+    assert agent.plan.current_step_index == 3
+    _assert_pending_in_sync(agent.plan)
+
+
+def test_unknown_step_or_status_is_rejected(registry):
+    agent = _plan_agent(registry)
+    assert registry.update_step(agent.id, 9, "completed") is None
+    registry.update_step(agent.id, 1, "bogus")
+    assert agent.plan.steps[0].status == StepStatus.PENDING
+    _assert_pending_in_sync(agent.plan)
+
+
+# Work units
+
+def _paths(work_units):
+    return [wu.path for wu in work_units]
+
+
+def _assert_agent_paths_in_sync(registry, *agents):
+    # Each agent's work units are the ones list_work_units attributes to it,
+    # in the same order
+    for agent in agents:
+        expected = [wu for wu in registry.list_work_units() if wu.agent_id == agent.id]
+        assert registry.get_agent_work_units(agent.id) == expected
+
+
+def test_work_unit_moves_between_agents(registry):
+    a = registry.register(task="a")
+    b = registry.register(task="b")
+    registry.track_file_access(a.id, "x.py", "read")
+    registry.track_file_access(a.id, "y.py", "read")
+    registry.track_file_access(b.id, "z.py", "write")
+
+    registry.track_file_access(b.id, "x.py", "write")
+    assert _paths(registry.get_agent_work_units(a.id)) == ["y.py"]
+    # x.py keeps its original position among the work units
+    assert _paths(registry.get_agent_work_units(b.id)) == ["x.py", "z.py"]
+    assert _paths(registry.list_work_units()) == ["x.py", "y.py", "z.py"]
+    _assert_agent_paths_in_sync(registry, a, b)
+
+
+def test_work_unit_paths_are_normalized(registry):
+    a = registry.register(task="a")
+    b = registry.register(task="b")
+    registry.track_file_access(a.id, "src\\x.py", "read")
+    registry.track_file_access(b.id, "src/x.py", "write")
+
+    assert registry.get_agent_work_units(a.id) == []
+    assert _paths(registry.get_agent_work_units(b.id)) == ["src/x.py"]
+    _assert_agent_paths_in_sync(registry, a, b)
+
+
+def test_remove_work_unit(registry):
+    a = registry.register(task="a")
+    registry.track_file_access(a.id, "x.py", "read")
+    registry.track_file_access(a.id, "y.py", "read")
+
+    assert registry.remove_work_unit("x.py")
+    assert not registry.remove_work_unit("x.py")
+    assert _paths(registry.get_agent_work_units(a.id)) == ["y.py"]
+
+    # A removed path comes back at the end
+    registry.track_file_access(a.id, "x.py", "write")
+    assert _paths(registry.get_agent_work_units(a.id)) == ["y.py", "x.py"]
+    _assert_agent_paths_in_sync(registry, a)
+
+
+def test_clear_agent_work_units(registry):
+    a = registry.register(task="a")
+    b = registry.register(task="b")
+    registry.track_file_access(a.id, "x.py", "read")
+    registry.track_file_access(a.id, "y.py", "read")
+    registry.track_file_access(b.id, "z.py", "read")
+    registry.track_file_access(b.id, "y.py", "write")
+
+    assert registry.clear_agent_work_units(a.id) == 1
+    assert registry.get_agent_work_units(a.id) == []
+    assert _paths(registry.list_work_units()) == ["y.py", "z.py"]
+    assert registry.clear_agent_work_units(a.id) == 0
+    _assert_agent_paths_in_sync(registry, a, b)
+
+
+def test_removing_agent_clears_its_work_units(registry):
+    a = registry.register(task="a")
+    b = registry.register(task="b")
+    registry.track_file_access(a.id, "x.py", "read")
+    registry.track_file_access(b.id, "y.py", "read")
+
+    registry.remove(a.id)
+    assert _paths(registry.list_work_units()) == ["y.py"]
+    _assert_agent_paths_in_sync(registry, b)
@@ -18,7 +18,8 @@ interface PlanStep {
   description: string
   status: 'pending' | 'in_progress' | 'completed' | 'skipped' | 'failed'
   files: string[]
-  logs: StepLog[]
+  logs: StepLog[]  // newest entries only; see logs_count
+  logs_count: number
   started_at: string | null
   completed_at: string | null
   // Extended fields for detailed plan view
@@ -98,7 +99,6 @@ interface Span {
   error_message: string | null
   file_path: string | null
   operation: string | null
-  children: Span[]
 }
 
 interface Run {
@@ -124,7 +124,7 @@ interface Run {
 interface RunWithSpans {
   run: Run
   spans: Span[]
-  root_span: Span | null
+  children: Record<string, string[]>
 }
 
 interface PlanDivergence {